@@ -274,9 +274,10 @@ def cell_qrx_level_min_explainer(sim, knowledge_router, query_key, params):
 )
 def cell_prb_ue_allocation_dict_explainer(sim, knowledge_router, query_key, params):
     return (
-        "The `prb_ue_allocation_dict` attribute is a dictionary mapping each connected UE's identifier to its allocated number of downlink and uplink PRBs. "
+        "The `prb_ue_allocation_dict` attribute is a read-only view mapping each connected UE's identifier to its allocated number of downlink and uplink PRBs. "
         "For example: {'IMSI_1': {'downlink': 10, 'uplink': 5}, ...}. "
-        "This structure is updated each scheduling cycle (simulation step) by the cell's resource allocation logic and reflects the current radio resource allocation for all UEs in the cell."
+        "The allocation itself lives in the cell's per-UE `dl_prb` and `ul_prb` arrays (indexed by the UE's slot in the cell), which the resource allocation logic updates each scheduling cycle (simulation step); "
+        "the dictionary is built from those arrays whenever the attribute is read, so it always reflects the current radio resource allocation for all UEs in the cell."
     )
 
 
@@ -293,7 +294,7 @@ def cell_prb_ue_allocation_dict_explainer(sim, knowledge_router, query_key, para
 def cell_allocated_dl_prb_explainer(sim, knowledge_router, query_key, params):
     return (
         "The `allocated_dl_prb` attribute represents the total number of downlink PRBs currently allocated to all UEs in a cell. "
-        "It is computed as the sum of the 'downlink' PRB allocations for each UE in the `prb_ue_allocation_dict`. "
+        "It equals the sum of the 'downlink' PRB allocations for each UE in the `prb_ue_allocation_dict`, and is kept as a running total updated by the resource allocation logic. "
         "This value provides a snapshot of downlink resource usage in the cell at any given time."
     )
 
@@ -311,7 +312,7 @@ def cell_allocated_dl_prb_explainer(sim, knowledge_router, query_key, params):
 def cell_allocated_ul_prb_explainer(sim, knowledge_router, query_key, params):
     return (
         "The `allocated_ul_prb` attribute represents the total number of uplink PRBs currently allocated to all UEs in a cell. "
-        "It is computed as the sum of the 'uplink' PRB allocations for each UE in the `prb_ue_allocation_dict`. "
+        "It equals the sum of the 'uplink' PRB allocations for each UE in the `prb_ue_allocation_dict`, and is kept as a running total updated by the resource allocation logic. "
         "This value provides a snapshot of uplink resource usage in the cell at any given time."
     )
 
@@ -498,7 +499,7 @@ def cell_allocate_prb_explainer(sim, knowledge_router, query_key, params):
         "   - If the total demand exceeds the available PRBs, the method first allocates at least one PRB to each UE to ensure minimum service. "
         "The remaining PRBs are then distributed proportionally based on each UE's required share of the total demand.\n\n"
         "This approach ensures that UEs with higher QoS requirements or better channel conditions receive more resources, while still providing a minimum allocation to all UEs. "
-        "The final allocation is stored in the `prb_ue_allocation_dict` attribute, which maps each UE's IMSI to its downlink and uplink PRB allocation."
+        "The final allocation is stored in the cell's per-UE `dl_prb` and `ul_prb` arrays and exposed through the `prb_ue_allocation_dict` attribute, which maps each UE's IMSI to its downlink and uplink PRB allocation."
     )
 
     return f"```python\n{code}\n```\n\n{explanation}"
@@ -524,12 +525,13 @@ def cell_monitor_ue_signal_strength_explainer(sim, knowledge_router, query_key,
         "The `monitor_ue_signal_strength` method in the Cell class measures and updates the uplink signal strength for each connected UE. "
         "This is a key step in simulating realistic radio conditions and is typically called at every simulation time step.\n\n"
         "The process works as follows:\n"
-        "1. The method initializes or clears the cell's `ue_uplink_signal_strength_dict`, which will store the measured uplink signal strength (in dBm) for each UE.\n"
-        "2. For each connected UE, it calculates the distance between the cell and the UE using their current positions (`position_x`, `position_y`).\n"
-        "3. It retrieves the UE's uplink transmit power (in dBm).\n"
-        "4. The method applies a path loss model (as configured in the simulation settings, e.g., Urban Macro NLOS) to estimate the signal attenuation over the distance and frequency.\n"
-        "5. The received uplink power at the cell is computed as the UE's transmit power minus the path loss.\n"
-        "6. The result is stored in `ue_uplink_signal_strength_dict` under the UE's IMSI.\n\n"
+        "1. For each connected UE, it reads the UE's current position (`position_x`, `position_y`) and uplink transmit power (in dBm), and records them in the cell's per-UE arrays at the UE's slot.\n"
+        "2. It calculates the distance between the cell and each UE.\n"
+        "3. The method applies a path loss model (as configured in the simulation settings, e.g., Urban Macro NLOS) to estimate the signal attenuation over the distance and frequency.\n"
+        "4. The received uplink power at the cell is computed as the UE's transmit power minus the path loss.\n"
+        "5. The result is stored in the cell's `ul_rssi` array at the UE's slot; slots without a connected UE hold NaN. "
+        "The `ue_uplink_signal_strength_dict` attribute exposes these values as a dictionary keyed by IMSI.\n\n"
+        "With many connected UEs the distances and path losses are computed for all of them at once with NumPy; with only a few UEs a plain per-UE loop is used instead.\n\n"
     )
     return f"```python\n{code}\n```\n\n{explanation}"
 
@@ -557,11 +559,11 @@ def cell_select_ue_mcs_explainer(sim, knowledge_router, query_key, params):
     explanation = (
         "The `select_ue_mcs` method in the Cell class determines and assigns the most suitable Modulation and Coding Scheme (MCS) for each connected UE based on its current Channel Quality Indicator (CQI).\n\n"
         "The process works as follows:\n"
-        "1. For each connected UE, the method resets the UE's `downlink_mcs_index` to -1 and `downlink_mcs_data` to None.\n"
-        "2. It retrieves the spectral efficiency for the UE's current CQI from the `UE_CQI_MCS_SPECTRAL_EFFICIENCY_TABLE`.\n"
-        "3. If the CQI is 0 or there is no matching entry, the UE is skipped (no MCS assigned).\n"
-        "4. Otherwise, the method iterates through the available MCS indices in `RAN_MCS_SPECTRAL_EFFICIENCY_TABLE` and selects the highest MCS index whose spectral efficiency does not exceed the UE's CQI spectral efficiency.\n"
-        "5. The selected MCS index and its associated parameters (such as modulation order, target code rate, and spectral efficiency) are assigned to the UE's `downlink_mcs_index` and `downlink_mcs_data` attributes.\n\n"
+        "1. When the module is loaded, a `_CQI_TO_MCS` lookup table is built once: for every non-zero CQI in `UE_CQI_MCS_SPECTRAL_EFFICIENCY_TABLE` it stores the highest MCS index in `RAN_MCS_SPECTRAL_EFFICIENCY_TABLE` whose spectral efficiency does not exceed the CQI's spectral efficiency, together with that MCS entry.\n"
+        "2. For each connected UE, the method looks up the UE's current CQI in `_CQI_TO_MCS`.\n"
+        "3. If the CQI is 0 or has no entry, the UE's `downlink_mcs_index` is set to -1 and `downlink_mcs_data` to None (no MCS assigned).\n"
+        "4. Otherwise the stored MCS index and its parameters (such as modulation order, target code rate, and spectral efficiency) are assigned to the UE's `downlink_mcs_index` and `downlink_mcs_data` attributes. "
+        "The MCS entry is a shared read-only mapping, so UEs on the same MCS do not get their own copy.\n\n"
         "This method ensures that each UE is assigned the most aggressive MCS it can reliably support, maximizing throughput while maintaining link reliability. "
         "The assigned MCS is then used in subsequent resource allocation and throughput estimation steps."
     )
@@ -583,15 +585,15 @@ def cell_estimate_ue_bitrate_and_latency_explainer(
 ):
     code = inspect.getsource(getattr(Cell, "estimate_ue_bitrate_and_latency"))
     explanation = (
-        "The `estimate_ue_bitrate_and_latency` method in the Cell class calculates the downlink (and potentially uplink) throughput and latency for each connected UE, "
-        "based on the PRB (Physical Resource Block) allocation and the selected Modulation and Coding Scheme (MCS) for each UE.\n\n"
+        "The `estimate_ue_bitrate_and_latency` method in the Cell class calculates the downlink throughput and queueing latency for all connected UEs of the cell in one vectorized pass, "
+        "based on the PRB (Physical Resource Block) allocation and the per-PRB throughput of each UE's Modulation and Coding Scheme (MCS).\n\n"
         "The process works as follows:\n"
-        "1. For each connected UE, the method first checks if the UE has valid downlink MCS data. If not, the UE is skipped for this estimation cycle.\n"
-        "2. For UEs with valid MCS data, the method retrieves the modulation order and target code rate from the UE's `downlink_mcs_data` attribute.\n"
-        "3. It then obtains the number of downlink PRBs allocated to the UE from the cell's `prb_ue_allocation_dict`.\n"
-        "4. The method calls the `estimate_throughput` utility function, passing the modulation order, code rate, and number of PRBs, to compute the estimated downlink bitrate for the UE.\n"
-        "5. The computed bitrate is set on the UE using the `set_downlink_bitrate` method.\n"
-        "6. (TODO in code) The method is also intended to estimate downlink and uplink latency, but this is not yet implemented.\n\n"
+        "1. It collects the connected UEs that have valid downlink MCS data; UEs without MCS data are skipped for this step.\n"
+        "2. For those UEs it looks up their slots in the cell's per-UE arrays. The downlink bitrate is the per-PRB throughput stored by `allocate_prb` (`dl_tput_per_prb`) multiplied by the UE's allocated downlink PRBs (`dl_prb`).\n"
+        "3. Each UE's downlink buffer (`dl_buffer_bytes`) is drained by the number of bytes it can send during the time step (`delta_time`), never below zero.\n"
+        "4. The downlink latency is estimated as a queueing delay: the remaining buffer divided by the UE's byte rate (0 when the UE has no capacity).\n"
+        "5. The bitrate, remaining buffer and latency are written back to each UE (`set_downlink_bitrate`, `dl_buffer_bytes`, `downlink_latency`).\n"
+        "Uplink bitrate and latency are not modelled yet.\n\n"
         "This method ensures that each UE's throughput reflects both its channel quality (via MCS) and its allocated radio resources (PRBs). "
     )
     return f"```python\n{code}\n```\n\n{explanation}"
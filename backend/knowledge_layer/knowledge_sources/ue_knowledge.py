@@ -1,4 +1,5 @@
 import json
+import types
 from ..knowledge_entry import knowledge_entry
 from ..tags import KnowledgeTag
 from ..relationships import KnowledgeRelationship
@@ -116,6 +117,8 @@ def get_ue_attributes(sim, knowledge_router, query_key, params):
     response = f"Attributes of UE {ue_imsi}:\n"
     for attr in SUPPORTED_UE_ATTRIBUTES:
         value = getattr(ue, attr, None)
+        if isinstance(value, types.MappingProxyType):
+            value = dict(value)  # shared read-only MCS entry
         response += f"- {attr}: {repr(value)}\n"
 
     return response
@@ -139,6 +142,8 @@ def get_ue_attribute_value(sim, knowledge_router, query_key, params):
     if attribute_name not in SUPPORTED_UE_ATTRIBUTES:
         return f"Attribute '{attribute_name}' is not supported."
     value = getattr(ue, attribute_name, None)
+    if isinstance(value, types.MappingProxyType):
+        value = dict(value)  # shared read-only MCS entry
     return f"Value of {attribute_name} for UE {ue_imsi}: {repr(value)}"
 
 
@@ -0,0 +1,123 @@
+# network_layer/_sched_numba.py
+# Inner PRB scheduling kernels used by Cell.allocate_prb.
+#
+# Optional:
+#   pip install numba
+#
+# With numba installed the kernels are JIT-compiled (nopython, cached on disk);
+# without it the same functions fall back to NumPy implementations, so callers
+# never need to check which one they got.
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+NUMBA_AVAILABLE = njit is not None
+
+
+if NUMBA_AVAILABLE:
+
+    @njit(cache=True)
+    def proportional_cap_alloc(desired, budget, out, rank):
+        # Split `budget` PRBs over UEs proportionally to `desired` (already
+        # capped per UE), writing the grant into `out`. Floor shares first,
+        # then hand the leftover to the largest fractional remainders without
+        # exceeding anyone's desired PRBs; equal remainders go to the higher
+        # `rank` first. Returns the number of PRBs used.
+        n = desired.shape[0]
+        total = 0
+        for i in range(n):
+            total += desired[i]
+        if total <= budget:
+            for i in range(n):
+                out[i] = desired[i]
+            return total
+
+        rem = np.empty(n, dtype=np.float64)
+        used = 0
+        for i in range(n):
+            share = budget * (desired[i] / total)
+            b = np.int64(budget) * desired[i] // total  # exact integer floor
+            if b >= desired[i]:
+                b = desired[i]
+                rem[i] = -1.0  # no headroom left
+            else:
+                rem[i] = share - b
+            out[i] = b
+            used += b
+
+        leftover = budget - used
+        if leftover > 0:
+            # stable sorts: by rank (high first), then by remainder (high first)
+            by_rank = np.argsort(-rank, kind="mergesort")
+            order = by_rank[np.argsort(-rem[by_rank], kind="mergesort")]
+            for j in range(n):
+                if leftover == 0:
+                    break
+                i = order[j]
+                if out[i] < desired[i]:
+                    out[i] += 1
+                    used += 1
+                    leftover -= 1
+        return used
+
+    @njit(cache=True)
+    def redistribute_leftover(desired, alloc, leftover, room, rank):
+        # Give `leftover` PRBs to UEs that still have headroom (desired - alloc),
+        # proportionally to that headroom. Updates `alloc` in place; `room` is
+        # scratch space of the same length. Returns the number of PRBs used.
+        n = desired.shape[0]
+        add = np.empty(n, dtype=alloc.dtype)
+        for i in range(n):
+            r = desired[i] - alloc[i]
+            room[i] = r if r > 0 else 0
+        used = proportional_cap_alloc(room, leftover, add, rank)
+        for i in range(n):
+            alloc[i] += add[i]
+        return used
+
+else:
+
+    def proportional_cap_alloc(desired, budget, out, rank):
+        total = int(desired.sum())
+        if total <= budget:
+            out[:] = desired
+            return total
+
+        share = budget * (desired / total)
+        base = (np.int64(budget) * desired // total).astype(out.dtype)
+        np.minimum(base, desired, out=base)
+        leftover = budget - int(base.sum())
+        if leftover > 0:
+            rem = share - base
+            rem[base >= desired] = -1.0  # no headroom left
+            # highest remainder first, ties to the higher rank, like the JIT kernel
+            base[np.lexsort((-rank, -rem))[:leftover]] += 1
+        out[:] = base
+        return int(base.sum())
+
+    def redistribute_leftover(desired, alloc, leftover, room, rank):
+        np.maximum(desired - alloc, 0, out=room)
+        add = np.empty_like(alloc)
+        used = proportional_cap_alloc(room, leftover, add, rank)
+        alloc += add
+        return used
+
+
+_warmed_up = False
+
+
+def warm_up():
+    # Trigger JIT compilation once so the first simulation step isn't slow.
+    global _warmed_up
+    if _warmed_up:
+        return
+    desired = np.array([3, 1], dtype=np.int32)
+    rank = np.array([1, 0], dtype=np.int32)
+    out = np.empty(2, dtype=np.int32)
+    proportional_cap_alloc(desired, 2, out, rank)
+    redistribute_leftover(desired, out.copy(), 1, np.empty(2, dtype=np.int32), rank)
+    _warmed_up = True
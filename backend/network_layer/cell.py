@@ -1,6 +1,78 @@
 import math
+import types
+import numpy as np
 import settings
 from utils import dist_between, estimate_throughput
+from ._sched_numba import proportional_cap_alloc, redistribute_leftover
+
+
+# Throughput is linear in the PRB count, so the per-PRB value only depends on
+# the MCS (modulation order, target code rate) pair.
+_TPUT_PER_PRB_CACHE = {}  # {(modulation_order, target_code_rate): bps per PRB}
+
+
+def _tput_per_prb(modulation_order, target_code_rate):
+    key = (modulation_order, target_code_rate)
+    v = _TPUT_PER_PRB_CACHE.get(key)
+    if v is None:
+        v = estimate_throughput(modulation_order, target_code_rate, 1)
+        _TPUT_PER_PRB_CACHE[key] = v
+    return v
+
+
+def _build_cqi_to_mcs():
+    # For each reported CQI, the highest MCS whose spectral efficiency does not
+    # exceed the CQI's. Both tables are static, so this only runs at import.
+    # MCS entries are wrapped read-only since every UE on that MCS shares them.
+    frozen_mcs_table = {
+        mcs_index: types.MappingProxyType(mcs_data)
+        for mcs_index, mcs_data in settings.RAN_MCS_SPECTRAL_EFFICIENCY_TABLE.items()
+    }
+    cqi_to_mcs = {}
+    for cqi, ue_cqi_mcs_data in settings.UE_CQI_MCS_SPECTRAL_EFFICIENCY_TABLE.items():
+        if cqi == 0:
+            continue
+        ue_cqi_eff = ue_cqi_mcs_data["spectral_efficiency"]
+        max_mcs_index = 0
+        for mcs_index, mcs_eff in settings.RAN_MCS_SPECTRAL_EFFICIENCY_TABLE.items():
+            if mcs_eff["spectral_efficiency"] <= ue_cqi_eff:
+                max_mcs_index = mcs_index
+            else:
+                break
+        cqi_to_mcs[cqi] = (max_mcs_index, frozen_mcs_table.get(max_mcs_index, None))
+    return cqi_to_mcs
+
+
+_CQI_TO_MCS = _build_cqi_to_mcs()  # {cqi: (mcs_index, mcs_data)}
+
+
+# Per-UE PRB cap used when Cell.prb_per_ue_cap is None
+_NO_PRB_CAP = np.int32(np.iinfo(np.int32).max)
+
+# Below this many connected UEs the uplink signal is computed per UE in Python
+_SIGNAL_VEC_MIN_UES = 16
+
+
+# Fixed slice enum; a UE's slice id is resolved once at register_ue and kept
+# in the cell's _ue_slice array.
+SLICE_IDS = {
+    settings.NETWORK_SLICE_EMBB_NAME: 0,
+    settings.NETWORK_SLICE_URLLC_NAME: 1,
+    settings.NETWORK_SLICE_MTC_NAME: 2,
+}
+
+
+# Per-UE arrays on Cell (struct-of-arrays, indexed by the UE's cell slot) and
+# the value an unused or reset slot holds.
+_SLOT_ARRAY_FILL = {
+    "dl_prb": 0,
+    "ul_prb": 0,
+    "dl_demand": -1,  # -1 = no PRB demand computed this step (no usable MCS)
+    "dl_tput_per_prb": 0.0,
+    "ul_rssi": np.nan,
+    "_ue_slice": -1,  # -1 = slice without a PRB budget
+    "_ue_rank": -1,  # position of the UE's IMSI among the cell's IMSIs (sorted)
+}
 
 
 class Cell:
@@ -22,56 +94,92 @@ class Cell:
         self.frequency_priority = cell_init_data["frequency_priority"]
         self.qrx_level_min = cell_init_data["qrx_level_min"]
 
-        self.prb_ue_allocation_dict = {}  # { "ue_imsi": {"downlink": 30, "uplink": 5}}
         self.connected_ue_list = {}
-        self.ue_uplink_signal_strength_dict = {}
         self.scheduler_policy = cell_init_data.get("scheduler_policy", "QoS-aware PFS")
-        
-        # cell.py __init__
-        self.dl_total_prb_demand = {}            # {imsi: int}
-        self.dl_throughput_per_prb_map = {}      # {imsi: float}
-        
+
+        # Per-UE state as arrays indexed by a compact slot assigned in register_ue
+        # (also stored as ue._cell_slot). prb_ue_allocation_dict and friends are
+        # built from these on access.
+        self._imsi_to_slot = {}
+        self._free_slots = []
+        self.dl_prb = np.zeros(0, dtype=np.int32)
+        self.ul_prb = np.zeros(0, dtype=np.int32)
+        self.dl_demand = np.full(0, -1, dtype=np.int32)
+        self.dl_tput_per_prb = np.zeros(0, dtype=np.float64)
+        self.ul_rssi = np.full(0, np.nan, dtype=np.float64)
+        self._ue_slice = np.full(0, -1, dtype=np.int8)
+        self._ue_rank = np.full(0, -1, dtype=np.int32)
+        self._ranks_dirty = False
+
+        # Uplink path loss model and carrier in GHz, fixed for the cell's lifetime
+        self._pathloss_model = settings.CHANNEL_PASS_LOSS_MODEL_VEC_MAP[
+            settings.CHANNEL_PASS_LOSS_MODEL_URBAN_MACRO_NLOS
+        ]
+        self._pathloss_scalar = settings.CHANNEL_PASS_LOSS_MODEL_MAP[
+            settings.CHANNEL_PASS_LOSS_MODEL_URBAN_MACRO_NLOS
+        ]
+        self._carrier_ghz = self.carrier_frequency_MHz / 1000
+
         # Limit for max DL PRBs any single UE can get (None = no cap)
         #self.prb_per_ue_cap = None
         self.prb_per_ue_cap = settings.RAN_PRB_PER_UE_CAP 
         
-        # Default (normalized) slice weights; xApp will override live
-        self.slice_weights = {"eMBB": 0.6, "URLLC": 0.3, "mMTC": 0.1}
+        # Default (normalized) slice weights; xApp will override live via
+        # set_slice_weights. Per-slice PRB budgets are derived lazily from
+        # these and max_dl_prb, and cached until either changes.
+        self._slice_budget_by_id = []  # [(slice id, PRB budget)] for budgeted slices
+        self._max_dl_prb_int = None
+        self.set_slice_weights({"eMBB": 0.6, "URLLC": 0.3, "mMTC": 0.1})
         # Keep your existing per-UE cap mechanism if present
         self.prb_per_ue_cap = getattr(self, "prb_per_ue_cap", None)
 
+        # Running PRB totals over dl_prb / ul_prb, kept in sync by
+        # register_ue / deregister_ue / allocate_prb
+        self._alloc_dl_total = 0
+        self._alloc_ul_total = 0
+
+        # Scratch rows (alloc, per-slice grant, headroom) reused by allocate_prb,
+        # grown on demand
+        self._alloc_scratch = np.empty((3, 0), dtype=np.int32)
+
+        # Bumped whenever the DL allocation or the connected UE set changes;
+        # to_json reuses its last dict while this stays the same
+        self._alloc_version = 0
+        self._dl_prb_last = self.dl_prb.copy()
+        self._json_cache = None
+        self._json_cache_version = -1
+        self._vis_cell_radius = self.cell_radius * settings.REAL_LIFE_DISTANCE_MULTIPLIER
+
 
 
     def __repr__(self):
         return f"Cell({self.cell_id}, base_station={self.base_station.bs_id}, frequency_band={self.frequency_band}, carrier_frequency_MHz={self.carrier_frequency_MHz})"
 
+    @property
+    def slice_weights(self):
+        # read-only view: changes must go through set_slice_weights so the
+        # cached per-slice budgets are recomputed
+        return types.MappingProxyType(self._slice_weights)
+
+    @slice_weights.setter
+    def slice_weights(self, weights):
+        self.set_slice_weights(weights)
+
+    def set_slice_weights(self, weights):
+        self._slice_weights = dict(weights)
+        self._weights_dirty = True
+
     @property
     def allocated_dl_prb(self):
-        return sum(
-            [
-                self.prb_ue_allocation_dict[ue_imsi]["downlink"]
-                for ue_imsi in self.connected_ue_list.keys()
-            ]
-        )
+        return self._alloc_dl_total
 
     @property
     def allocated_ul_prb(self):
-        return sum(
-            [
-                self.prb_ue_allocation_dict[ue_imsi]["uplink"]
-                for ue_imsi in self.connected_ue_list.keys()
-            ]
-        )
+        return self._alloc_ul_total
 
     @property
     def allocated_prb(self):
-        return sum(
-            [
-                self.prb_ue_allocation_dict[ue_imsi]["uplink"]
-                + self.prb_ue_allocation_dict[ue_imsi]["downlink"]
-                for ue_imsi in self.connected_ue_list.keys()
-            ]
-        )
+        return self._alloc_dl_total + self._alloc_ul_total
 
     @property
     def current_load(self):
@@ -85,6 +193,47 @@ class Cell:
     def current_ul_load(self):
         return self.allocated_ul_prb / self.max_ul_prb
 
+    @property
+    def prb_ue_allocation_dict(self):
+        # { "ue_imsi": {"downlink": 30, "uplink": 5}}
+        dl_prb = self.dl_prb.tolist()
+        ul_prb = self.ul_prb.tolist()
+        return {
+            imsi: {"downlink": dl_prb[slot], "uplink": ul_prb[slot]}
+            for imsi, slot in self._imsi_to_slot.items()
+        }
+
+    @property
+    def dl_total_prb_demand(self):
+        # {imsi: int}, only UEs that had a usable MCS in the last allocation
+        dl_demand = self.dl_demand.tolist()
+        return {
+            imsi: dl_demand[slot]
+            for imsi, slot in self._imsi_to_slot.items()
+            if dl_demand[slot] >= 0
+        }
+
+    @property
+    def dl_throughput_per_prb_map(self):
+        # {imsi: float}, same UEs as dl_total_prb_demand
+        dl_demand = self.dl_demand.tolist()
+        dl_tput_per_prb = self.dl_tput_per_prb.tolist()
+        return {
+            imsi: dl_tput_per_prb[slot]
+            for imsi, slot in self._imsi_to_slot.items()
+            if dl_demand[slot] >= 0
+        }
+
+    @property
+    def ue_uplink_signal_strength_dict(self):
+        # {imsi: received power (dBm)}
+        ul_rssi = self.ul_rssi.tolist()
+        return {
+            imsi: ul_rssi[slot]
+            for imsi, slot in self._imsi_to_slot.items()
+            if not math.isnan(ul_rssi[slot])
+        }
+
     @property
     def position_x(self):
         return self.base_station.position_x
@@ -93,61 +242,78 @@ class Cell:
     def position_y(self):
         return self.base_station.position_y
 
+    def _grow_slot_arrays(self, min_size):
+        size = max(8, 2 * self.dl_prb.size)
+        while size < min_size:
+            size *= 2
+        for name, fill in _SLOT_ARRAY_FILL.items():
+            old = getattr(self, name)
+            new = np.full(size, fill, dtype=old.dtype)
+            new[: old.size] = old
+            setattr(self, name, new)
+
+    def _reset_slot(self, slot):
+        self._alloc_dl_total -= int(self.dl_prb[slot])
+        self._alloc_ul_total -= int(self.ul_prb[slot])
+        for name, fill in _SLOT_ARRAY_FILL.items():
+            getattr(self, name)[slot] = fill
+        self._alloc_version += 1
+
     def register_ue(self, ue):
         self.connected_ue_list[ue.ue_imsi] = ue
-        self.prb_ue_allocation_dict[ue.ue_imsi] = {
-            "downlink": 0,
-            "uplink": 0,
-        }
+        slot = self._imsi_to_slot.get(ue.ue_imsi, None)
+        if slot is None:
+            if self._free_slots:
+                slot = self._free_slots.pop()
+            else:
+                slot = len(self._imsi_to_slot)
+                if slot >= self.dl_prb.size:
+                    self._grow_slot_arrays(slot + 1)
+            self._imsi_to_slot[ue.ue_imsi] = slot
+        self._reset_slot(slot)
+        ue._cell_slot = slot
+        self._ranks_dirty = True
+        # unset/unknown slice -> -1: no slice budget, only global leftover PRBs
+        self._ue_slice[slot] = SLICE_IDS.get(ue.slice_type, -1)
 
     def monitor_ue_signal_strength(self):
-        self.ue_uplink_signal_strength_dict = {}
-        pass_loss_model = settings.CHANNEL_PASS_LOSS_MODEL_MAP[
-            settings.CHANNEL_PASS_LOSS_MODEL_URBAN_MACRO_NLOS
+        # one pass over the connected UEs: (slot, x, y, transmit power)
+        rows = [
+            (ue._cell_slot, ue.position_x, ue.position_y, ue.uplink_transmit_power_dBm)
+            for ue in self.connected_ue_list.values()
         ]
-        # monitor the ue uplink signal strength
-        for ue in self.connected_ue_list.values():
-            # calculate the received power based on distance and transmit power
-            distance = dist_between(
-                self.position_x,
-                self.position_y,
-                ue.position_x,
-                ue.position_y,
-            )
-            received_power = ue.uplink_transmit_power_dBm - pass_loss_model(
-                distance_m=distance, frequency_ghz=self.carrier_frequency_MHz / 1000
-            )
-            self.ue_uplink_signal_strength_dict[ue.ue_imsi] = received_power
+        if not rows:
+            return
+
+        # few UEs: plain scalar math beats the NumPy call overhead
+        if len(rows) < _SIGNAL_VEC_MIN_UES:
+            for slot, x, y, tx_dbm in rows:
+                distance = dist_between(self.position_x, self.position_y, x, y)
+                self.ul_rssi[slot] = tx_dbm - self._pathloss_scalar(
+                    distance_m=distance, frequency_ghz=self._carrier_ghz
+                )
+            return
+
+        # monitor the ue uplink signal strength for all occupied slots at once
+        # (unused slots keep their NaN fill)
+        data = np.array(rows, dtype=np.float64)
+        slots = data[:, 0].astype(np.intp)
+        x, y, tx_dbm = data[:, 1], data[:, 2], data[:, 3]
+        distance = np.hypot(self.position_x - x, self.position_y - y)
+        self.ul_rssi[slots] = tx_dbm - self._pathloss_model(
+            distance_m=distance, frequency_ghz=self._carrier_ghz
+        )
 
     def select_ue_mcs(self):
         for ue in self.connected_ue_list.values():
-            ue.set_downlink_mcs_index(-1)
-            ue.set_downlink_mcs_data(None)
-            ue_cqi_mcs_data = settings.UE_CQI_MCS_SPECTRAL_EFFICIENCY_TABLE.get(
-                ue.downlink_cqi, None
-            )
-            if ue.downlink_cqi == 0 or ue_cqi_mcs_data is None:
-                continue
-
-            ue_cqi_eff = ue_cqi_mcs_data["spectral_efficiency"]
-            max_mcs_index = 0
-            for (
-                mcs_index,
-                mcs_eff,
-            ) in settings.RAN_MCS_SPECTRAL_EFFICIENCY_TABLE.items():
-                if mcs_eff["spectral_efficiency"] <= ue_cqi_eff:
-                    max_mcs_index = mcs_index
-                else:
-                    break
-            ue.set_downlink_mcs_index(max_mcs_index)
-            downlink_mcs_data = settings.RAN_MCS_SPECTRAL_EFFICIENCY_TABLE.get(
-                max_mcs_index, None
-            )
-            if downlink_mcs_data is None:
+            entry = _CQI_TO_MCS.get(ue.downlink_cqi, None)
+            if entry is None:
+                ue.set_downlink_mcs_index(-1)
                 ue.set_downlink_mcs_data(None)
-            else:
-                # copy the dictionary to avoid modifying the original data
-                ue.set_downlink_mcs_data(downlink_mcs_data.copy())
+                continue
+            ue.set_downlink_mcs_index(entry[0])
+            # shared read-only MCS entry; no per-UE copy needed
+            ue.set_downlink_mcs_data(entry[1])
 
     def step(self, delta_time):
         self.monitor_ue_signal_strength()
@@ -157,6 +323,9 @@ class Cell:
 
         # allocate PRBs dynamically based on each UE's QoS profile and channel conditions
         self.allocate_prb()
+        if not np.array_equal(self.dl_prb, self._dl_prb_last):
+            self._dl_prb_last = self.dl_prb.copy()
+            self._alloc_version += 1
 
         # for each UE, estimate the downlink, uplink bitrate and latency
         #self.estimate_ue_bitrate_and_latency()
@@ -312,54 +481,20 @@ class Cell:
     #     for imsi, a in alloc.items():
     #         self.prb_ue_allocation_dict[imsi]["downlink"] = int(a)
     
-    def allocate_prb(self):
-        # QoS-aware PF with optional per-UE cap and slice shares
-
-        # Reset PRBs
-        for ue in self.connected_ue_list.values():
-            self.prb_ue_allocation_dict[ue.ue_imsi]["downlink"] = 0
-            self.prb_ue_allocation_dict[ue.ue_imsi]["uplink"] = 0
-
-        # ---- Step 1: per-UE demand from GBR + MCS
-        ue_prb_requirements = {}
-        for ue in self.connected_ue_list.values():
-            dl_gbr = getattr(ue, "qos_profile", {}).get("GBR_DL", 0.0)
-            dl_mcs = getattr(ue, "downlink_mcs_data", None)
-            if not dl_mcs:
-                # No usable MCS → skip demand this step
-                # print(f"Cell {self.cell_id}: UE {ue.ue_imsi} missing MCS")
-                continue
-            dl_tput_per_prb = estimate_throughput(
-                dl_mcs["modulation_order"], dl_mcs["target_code_rate"], 1
-            )
-            want = int(max(0, math.ceil((dl_gbr or 0.0) / max(dl_tput_per_prb, 1e-9))))
-            ue_prb_requirements[ue.ue_imsi] = {
-                "slice": getattr(ue, "slice_type", "eMBB"),  # default to eMBB
-                "want": want,
-                "tput_per_prb": dl_tput_per_prb,
-            }
-
-        # Persist for xApp KPIs
-        self.dl_total_prb_demand = {imsi: d["want"] for imsi, d in ue_prb_requirements.items()}
-        self.dl_throughput_per_prb_map = {imsi: d["tput_per_prb"] for imsi, d in ue_prb_requirements.items()}
-
-        if not ue_prb_requirements:
-            self.allocated_dl_prb = 0
-            return
-
-        # ---- Step 2: slice budgets
-        budget = int(getattr(self, "max_dl_prb", 0))
-        weights = dict(getattr(self, "slice_weights", {})) or {"eMBB": 1.0}
+    def _rank_ues(self):
+        # rank registered UEs by IMSI string; only needed when the UE set changed
+        for rank, imsi in enumerate(sorted(self._imsi_to_slot)):
+            self._ue_rank[self._imsi_to_slot[imsi]] = rank
+        self._ranks_dirty = False
+
+    def _split_slice_budget(self):
+        budget = int(self.max_dl_prb)
+        weights = dict(self._slice_weights) or {"eMBB": 1.0}
         # normalize in case someone set odd values
         ws = sum(max(0.0, v) for v in weights.values()) or 1.0
         for k in list(weights.keys()):
             weights[k] = max(0.0, float(weights[k])) / ws
 
-        # Which slices actually have UEs this step?
-        slice_to_imsis = collections.defaultdict(list)
-        for imsi, d in ue_prb_requirements.items():
-            slice_to_imsis[d["slice"]].append(imsi)
-
         # Weighted budgets per slice (largest remainders for rounding)
         raw = {s: budget * weights.get(s, 0.0) for s in weights}
         base = {s: int(math.floor(v)) for s, v in raw.items()}
@@ -372,101 +507,95 @@ class Cell:
             slice_budget[s] += 1
             leftover -= 1
 
-        # ---- Step 3: per-slice allocation with per-UE cap
-        cap = getattr(self, "prb_per_ue_cap", None)
-        alloc = {imsi: 0 for imsi in ue_prb_requirements}
-        global_leftover = 0
+        self._slice_budget_by_id = [
+            (SLICE_IDS[s], b) for s, b in slice_budget.items() if s in SLICE_IDS and b > 0
+        ]
+        self._max_dl_prb_int = budget
+        self._weights_dirty = False
 
-        for s, imsis in slice_to_imsis.items():
-            B = int(slice_budget.get(s, 0))
-            if B <= 0:
-                continue
+    def allocate_prb(self):
+        # QoS-aware PF with optional per-UE cap and slice shares
 
-            # desired = min(want, cap) if cap set
-            desired = {}
-            for imsi in imsis:
-                want = ue_prb_requirements[imsi]["want"]
-                desired[imsi] = min(want, int(cap)) if cap is not None else want
+        # Reset PRBs (unused slots are already zero)
+        self.dl_prb.fill(0)
+        self.ul_prb.fill(0)
+        self.dl_demand.fill(-1)
+        self.dl_tput_per_prb.fill(0.0)
+        self._alloc_dl_total = 0
+        self._alloc_ul_total = 0
 
-            total_desired = sum(desired.values())
-            if total_desired == 0:
-                global_leftover += B
+        # ---- Step 1: per-UE demand from GBR + MCS
+        slots, gbrs, tputs = [], [], []
+        for ue in self.connected_ue_list.values():
+            # connected UEs are registered, so slice_type/qos_profile are set
+            dl_gbr = ue.qos_profile.get("GBR_DL", 0.0)
+            dl_mcs = ue.downlink_mcs_data
+            if not dl_mcs:
+                # No usable MCS → skip demand this step
+                # print(f"Cell {self.cell_id}: UE {ue.ue_imsi} missing MCS")
                 continue
+            dl_tput_per_prb = _tput_per_prb(
+                dl_mcs["modulation_order"], dl_mcs["target_code_rate"]
+            )
+            slots.append(ue._cell_slot)
+            gbrs.append(dl_gbr or 0.0)
+            tputs.append(dl_tput_per_prb)
 
-            if total_desired <= B:
-                # can satisfy all in this slice
-                for imsi, want in desired.items():
-                    alloc[imsi] += int(want)
-                # leftover slice PRBs become global
-                global_leftover += B - total_desired
+        if not slots:
+            return
+
+        # Persist for xApp KPIs
+        slots = np.asarray(slots, dtype=np.intp)
+        tputs = np.asarray(tputs, dtype=np.float64)
+        want_f = np.asarray(gbrs, dtype=np.float64) / np.maximum(tputs, 1e-9)
+        want = np.ceil(np.maximum(want_f, 0.0), out=want_f).astype(np.int32)
+        self.dl_demand[slots] = want
+        self.dl_tput_per_prb[slots] = tputs
+
+        # ---- Step 2: slice budgets (recomputed only when weights/max_dl_prb change)
+        if self._weights_dirty or self._max_dl_prb_int != self.max_dl_prb:
+            self._split_slice_budget()
+
+        # ---- Step 3: per-slice allocation with per-UE cap
+        n_ue = len(slots)
+        ue_slice = self._ue_slice[slots]
+        # equal remainders go to the larger IMSI, as with the sorted (rem, imsi) tuples
+        if self._ranks_dirty:
+            self._rank_ues()
+        rank = self._ue_rank[slots]
+
+        # desired = min(want, cap); no cap set means an int32-max cap
+        cap = self.prb_per_ue_cap
+        desired = np.minimum(want, _NO_PRB_CAP if cap is None else np.int32(cap))
+
+        if self._alloc_scratch.shape[1] < n_ue:
+            size = max(n_ue, 2 * self._alloc_scratch.shape[1])
+            self._alloc_scratch = np.empty((3, size), dtype=np.int32)
+        alloc, slice_out, room = self._alloc_scratch[:, :n_ue]
+        alloc.fill(0)
+        global_leftover = 0
+
+        for s_id, B in self._slice_budget_by_id:
+            m = np.flatnonzero(ue_slice == s_id)
+            if not m.size:
                 continue
 
-            # proportional floor + remainders (respect cap)
-            remainders = []
-            used = 0
-            base_alloc = {}
-            for imsi, want in desired.items():
-                share_f = B * (want / total_desired)
-                b = int(math.floor(share_f))
-                base_alloc[imsi] = min(b, want)
-                used += base_alloc[imsi]
-                remainders.append((share_f - b, imsi, want))
-
-            L = max(0, B - used)
-            remainders.sort(reverse=True)
-            for _, imsi, want in remainders:
-                if L <= 0:
-                    break
-                if base_alloc[imsi] < want:
-                    base_alloc[imsi] += 1
-                    L -= 1
-
-            for imsi, a in base_alloc.items():
-                alloc[imsi] += int(a)
-
-        # ---- Step 4: redistribute any global leftover to UEs that still have headroom
+            # proportional floor + largest remainders (respect cap); whatever
+            # the slice can't use becomes global leftover
+            slice_desired = desired[m]
+            out = slice_out[: slice_desired.size]
+            used = proportional_cap_alloc(slice_desired, B, out, rank[m])
+            alloc[m] += out
+            global_leftover += B - used
+
+        # ---- Step 4: redistribute any global leftover to UEs that still have headroom,
+        # proportional to remaining room (if nobody can take more it is dropped)
         if global_leftover > 0:
-            # room = desired - alloc (recompute desired with cap)
-            room = {}
-            total_room = 0
-            for imsi, d in ue_prb_requirements.items():
-                want = d["want"]
-                desired = min(want, int(cap)) if cap is not None else want
-                r = max(0, desired - alloc[imsi])
-                room[imsi] = r
-                total_room += r
-
-            if total_room > 0:
-                # proportional to remaining room
-                rema = []
-                add = {imsi: 0 for imsi in room}
-                used = 0
-                for imsi, r in room.items():
-                    share_f = global_leftover * (r / total_room) if total_room > 0 else 0
-                    b = int(math.floor(share_f))
-                    add[imsi] = min(b, r)
-                    used += add[imsi]
-                    rema.append((share_f - b, imsi, r))
-
-                L = max(0, global_leftover - used)
-                rema.sort(reverse=True)
-                for _, imsi, r in rema:
-                    if L <= 0:
-                        break
-                    if add[imsi] < r:
-                        add[imsi] += 1
-                        L -= 1
-
-                for imsi, inc in add.items():
-                    alloc[imsi] += inc
-            # else: nobody can take more → drop leftover
+            redistribute_leftover(desired, alloc, global_leftover, room, rank)
 
         # ---- Commit
-        total_alloc = 0
-        for imsi, a in alloc.items():
-            self.prb_ue_allocation_dict[imsi]["downlink"] = int(a)
-            total_alloc += int(a)
-        self.allocated_dl_prb = int(total_alloc)
+        self.dl_prb[slots] = alloc
+        self._alloc_dl_total = int(alloc.sum())
 
 
         # # Logging
@@ -493,64 +622,79 @@ class Cell:
             # TODO: downlink and uplink latency
       '''      
     def estimate_ue_bitrate_and_latency(self, delta_time):
+        ues = []
         for ue in self.connected_ue_list.values():
             if ue.downlink_mcs_data is None:
                 print(f"Cell {self.cell_id}: UE {ue.ue_imsi} has no downlink MCS data. Skipping.")
                 continue
+            ues.append(ue)
+        if not ues:
+            return
+        slots = [ue._cell_slot for ue in ues]
 
-            ue_modulation_order = ue.downlink_mcs_data["modulation_order"]
-            ue_code_rate = ue.downlink_mcs_data["target_code_rate"]
-            ue_dl_prb  = self.prb_ue_allocation_dict[ue.ue_imsi]["downlink"]
+        # Achievable DL bitrate (bits/s); per-PRB throughput was stored by allocate_prb
+        # TODO: uplink bitrate
+        dl_bitrate = self.dl_tput_per_prb[slots] * self.dl_prb[slots]
+        # TODO: downlink and uplink latency
 
-            # Achievable DL bitrate (bits/s)
-            # TODO: uplink bitrate
-            dl_bitrate = estimate_throughput(ue_modulation_order, ue_code_rate, ue_dl_prb)
-            ue.set_downlink_bitrate(dl_bitrate)
-            # TODO: downlink and uplink latency
+        # Drain each UE's DL buffer by what it can send this step
+        bytes_per_sec = dl_bitrate / 8.0
+        buf = np.fromiter((ue.dl_buffer_bytes for ue in ues), dtype=np.float64, count=len(ues))
+        buf -= np.minimum(bytes_per_sec * delta_time, buf)
 
-            # Optional: drain a per-UE buffer if you added ue.dl_buffer_bytes
-            if hasattr(ue, "dl_buffer_bytes"):
-                bytes_can_send   = (dl_bitrate / 8.0) * delta_time
-                transmitted      = min(bytes_can_send, ue.dl_buffer_bytes)
-                ue.dl_buffer_bytes -= transmitted
+        # Simple queueing-delay proxy (seconds). Set 0 if no capacity.
+        latency = np.zeros_like(buf)
+        np.divide(buf, bytes_per_sec, out=latency, where=bytes_per_sec > 0)
 
-                # Simple queueing-delay proxy (seconds). Set 0 if no capacity.
-                ue.downlink_latency = (ue.dl_buffer_bytes / (dl_bitrate / 8.0)) if dl_bitrate > 0 else 0.0
+        for ue, rate, b, lat in zip(ues, dl_bitrate.tolist(), buf.tolist(), latency.tolist()):
+            ue.set_downlink_bitrate(rate)
+            ue.dl_buffer_bytes = b
+            ue.downlink_latency = lat
 
     def deregister_ue(self, ue):
-        if ue.ue_imsi in self.prb_ue_allocation_dict:
-            del self.prb_ue_allocation_dict[ue.ue_imsi]
+        slot = self._imsi_to_slot.pop(ue.ue_imsi, None)
+        if slot is not None:
+            self._reset_slot(slot)
+            self._free_slots.append(slot)
             print(f"Cell {self.cell_id}: Released resources for UE {ue.ue_imsi}")
         else:
             print(f"Cell {self.cell_id}: No resources to release for UE {ue.ue_imsi}")
 
         if ue.ue_imsi in self.connected_ue_list:
             del self.connected_ue_list[ue.ue_imsi]
+            self._alloc_version += 1
             print(f"Cell {self.cell_id}: Deregistered UE {ue.ue_imsi}")
         else:
             print(f"Cell {self.cell_id}: No UE {ue.ue_imsi} to deregister")
 
     def to_json(self):
-        return {
+        # Only allocations and connected UEs change during a run; rebuild the
+        # dict when either did. Callers serialize it without modifying it.
+        if self._json_cache_version == self._alloc_version:
+            return self._json_cache
+
+        multiplier = settings.REAL_LIFE_DISTANCE_MULTIPLIER
+        self._json_cache = {
             "cell_id": self.cell_id,
             "frequency_band": self.frequency_band,
             "carrier_frequency_MHz": self.carrier_frequency_MHz,
             "bandwidth_Hz": self.bandwidth_Hz,
             "max_prb": self.max_prb,
             "cell_radius": self.cell_radius,
-            "vis_cell_radius": self.cell_radius
-            * settings.REAL_LIFE_DISTANCE_MULTIPLIER,
+            "vis_cell_radius": self._vis_cell_radius,
             "position_x": self.position_x,
             "position_y": self.position_y,
-            "vis_position_x": self.position_x * settings.REAL_LIFE_DISTANCE_MULTIPLIER,
-            "vis_position_y": self.position_y * settings.REAL_LIFE_DISTANCE_MULTIPLIER,
+            "vis_position_x": self.position_x * multiplier,
+            "vis_position_y": self.position_y * multiplier,
             "prb_ue_allocation_dict": self.prb_ue_allocation_dict,
             "max_dl_prb": self.max_dl_prb,
             "max_ul_prb": self.max_ul_prb,
-            "allocated_dl_prb": self.allocated_dl_prb,
-            "allocated_ul_prb": self.allocated_ul_prb,
-            "current_dl_load": self.allocated_dl_prb / self.max_dl_prb,
-            "current_ul_load": self.allocated_ul_prb / self.max_ul_prb,
-            "current_load": self.current_load,
+            "allocated_dl_prb": self._alloc_dl_total,
+            "allocated_ul_prb": self._alloc_ul_total,
+            "current_dl_load": self._alloc_dl_total / self.max_dl_prb,
+            "current_ul_load": self._alloc_ul_total / self.max_ul_prb,
+            "current_load": (self._alloc_dl_total + self._alloc_ul_total) / self.max_prb,
             "connected_ue_list": list(self.connected_ue_list.keys()),
         }
+        self._json_cache_version = self._alloc_version
+        return self._json_cache
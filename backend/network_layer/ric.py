@@ -32,6 +32,7 @@ class RIC:
 
     def load_xApps(self):
         # dynamically load xApps from the xApp directory
+        self.stop_xApps()
         self.xapp_list = {}
 
         xapp_classes = []
@@ -57,6 +58,13 @@ class RIC:
         for xapp in self.xapp_list.values():
             xapp.start()
 
+    def stop_xApps(self):
+        for xapp in self.xapp_list.values():
+            try:
+                xapp.stop()
+            except Exception as e:
+                logger.error(f"RIC: Failed to stop xApp {xapp.xapp_id}: {e}")
+
     def step(self, delta_time):
         # Step through all xApps
         for xapp in self.xapp_list.values():
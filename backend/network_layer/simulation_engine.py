@@ -6,6 +6,7 @@ from utils import get_random_ue_operational_region
 from .core_network import CoreNetwork
 from .base_station import BaseStation
 from .cell import Cell
+from ._sched_numba import warm_up as warm_up_scheduler
 from .ric import RIC
 from .ue import UE
 import settings
@@ -47,6 +48,8 @@ class SimulationEngine(metaclass=utils.SingletonMeta):
 
     def reset_network(self):
         logger.info("Resetting network...")
+        if self.ric is not None:
+            self.ric.stop_xApps()
         self.base_station_list = {}
         self.cell_list = {}
         self.ue_list = {}
@@ -306,6 +309,8 @@ class SimulationEngine(metaclass=utils.SingletonMeta):
         assert not self.sim_started
         self.sim_step = 0
         self.sim_started = True
+        # JIT-compile the PRB scheduling kernels once, before the first step
+        warm_up_scheduler()
 
         while self.sim_started and self.sim_step < settings.SIM_MAX_STEP:
             print(f"\n========= TIME STEP: {self.sim_step} ==========\n")
@@ -326,10 +331,15 @@ class SimulationEngine(metaclass=utils.SingletonMeta):
             )
             await asyncio.sleep(settings.SIM_STEP_TIME_DEFAULT)
 
+        # the loop also ends at SIM_MAX_STEP without stop(): flush/close xApps
+        if self.ric is not None:
+            self.ric.stop_xApps()
         print("simulation ended")
 
     def stop(self):
         self.sim_started = False
+        if self.ric is not None:
+            self.ric.stop_xApps()
         self.logs.append("Simulation stopped")
         print("Simulation stopped")
 
@@ -63,6 +63,7 @@ class UE:
         self.uplink_transmit_power_dBm = settings.UE_TRANSMIT_POWER
 
         self.current_cell = None
+        self._cell_slot = None  # index into the serving cell's per-UE arrays
         self.serving_cell_history = []
 
         self.ai_service_subscriptions = {}
@@ -547,7 +548,11 @@ class UE:
             "downlink_sinr": self.downlink_sinr,
             "downlink_cqi": self.downlink_cqi,
             "downlink_mcs_index": self.downlink_mcs_index,
-            "downlink_mcs_data": self.downlink_mcs_data,
+            "downlink_mcs_data": (
+                dict(self.downlink_mcs_data)
+                if self.downlink_mcs_data is not None
+                else None
+            ),
             "ai_service_subscriptions": {
                 subscription_id: subscription.to_json()
                 for subscription_id, subscription in self.ai_service_subscriptions.items()
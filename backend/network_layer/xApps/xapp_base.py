@@ -30,6 +30,12 @@ class xAppBase:
         # if this method is overridden, it will be called in each simulation step by the RIC.
         pass
 
+    def stop(self):
+        # Called by the RIC when the simulation stops or the xApps are replaced.
+        # xApps holding files or threads release them here; step() may still be
+        # called again afterwards (simulation restarted), so reacquire lazily.
+        pass
+
     def to_json(self):
         # Get the source code of the actual class (including child classes)
         try:
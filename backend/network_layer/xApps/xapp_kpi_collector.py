@@ -1,13 +1,40 @@
 # network_layer/xApps/xapp_kpi_collector.py
-import csv, time
+import csv, io, logging, time
+from operator import attrgetter
+from settings import RIC_KPI_SKIP_UNCHANGED_ROWS
 from .xapp_base import xAppBase
 
+logger = logging.getLogger(__name__)
+
+WRITE_BUFFER_BYTES = 1 << 20
+# Rows are batched in memory and written once either limit is reached
+ROW_BUFFER_LIMIT = 1024
+FLUSH_INTERVAL_SEC = 0.5
+
+# UE attributes a KPI row is built from (all set in UE.__init__); together with
+# the serving cell's allocation version they tell whether the row can change
+_UE_ROW_STATE = attrgetter(
+    "slice_type", "downlink_mcs_index", "downlink_cqi", "downlink_bitrate",
+    "downlink_latency", "dl_buffer_bytes", "last_new_dl_bytes",
+    "position_x", "position_y", "uplink_transmit_power_dBm",
+)
+
 class xAppKPICollector(xAppBase):
     def __init__(self, ric=None, out_path="kpis.csv"):
         super().__init__(ric=ric)
         self.enabled = True
         self.out_path = out_path
-        self._wrote_header = False
+
+        # persistent, buffered CSV output (opened by the first flush with rows)
+        self._f = None
+        self._w = None  # csv.writer over _text; batches are encoded and written once
+        self._text = io.StringIO()
+        self._row_buf = []
+        self._last_flush = time.time()
+        # settings.RIC_KPI_SKIP_UNCHANGED_ROWS: only write a UE's row when its
+        # inputs changed since the last written row (quiescent UEs cost no row)
+        self.skip_unchanged_rows = RIC_KPI_SKIP_UNCHANGED_ROWS
+        self._last_state = {}  # {imsi: _row_state of the last written row}
 
         self.fields = [
             "Timestamp","num_ues","IMSI",
@@ -19,41 +46,65 @@ class xAppKPICollector(xAppBase):
             "sum_requested_prbs","sum_granted_prbs",
             "dl_pmi","dl_ri","ul_n","ul_turbo_iters",
         ]
+        # immutable header handed out by to_json; encoders serialize it as a list
+        self._fields_tuple = tuple(self.fields)
 
     def start(self):
+        # nothing to do up front: the CSV is opened lazily by flush(), so a run
+        # that never writes a row doesn't create or touch the file
         pass
 
-    def _row_for_ue(self, ue):
+    def _open(self):
+        # binary append: skips the TextIOWrapper, one write() per batch
+        self._f = open(self.out_path, "ab", buffering=WRITE_BUFFER_BYTES)
+        self._w = csv.writer(self._text)
+        if self._f.tell() == 0:
+            self._write_rows((self.fields,))
+
+    def _write_rows(self, rows):
+        self._w.writerows(rows)
+        self._f.write(self._text.getvalue().encode())
+        self._text.seek(0)
+        self._text.truncate()
+
+    def _cell_context(self, cell):
+        # Values shared by every UE of a cell, resolved once per cell per step:
+        # (num_ues, scheduling_policy, dl_prb, dl_demand, ul_rssi)
+        if cell is None:
+            return (len(self.ue_list), None, None, None, None)  # fallback
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Cell %s dl_total_prb_demand: %s", cell.cell_id, cell.dl_total_prb_demand
+            )
+        # cell arrays are indexed by the UE's cell slot
+        return (
+            len(cell.connected_ue_list),
+            cell.scheduler_policy,
+            cell.dl_prb.tolist(),
+            cell.dl_demand.tolist(),
+            cell.ul_rssi.tolist(),
+        )
+
+    def _row_for_ue(self, ue, ctx, now_ms):
         # Prefer connected UEs in this serving cell for num_ues
-        cell = ue.current_cell
-        bs   = ue.current_bs
-        if cell:
-            num_ues = len(cell.connected_ue_list)
-        else:
-            num_ues = len(self.ue_list)  # fallback
-
-        # Scheduling policy + PRBs
-        scheduling_policy = getattr(cell, "scheduler_policy", None) if cell else None
-        prb_alloc = cell.prb_ue_allocation_dict.get(ue.ue_imsi, {"downlink":0,"uplink":0}) if cell else {"downlink":0,"uplink":0}
-        dl_granted = prb_alloc["downlink"]
-
-        dl_requested = None
-        if cell and hasattr(cell, "dl_total_prb_demand"):
-            print(f"Cell {cell.cell_id} has dl_total_prb_demand: {cell.dl_total_prb_demand}")
-            dl_requested = cell.dl_total_prb_demand.get(ue.ue_imsi, None)
-        else:
-            dl_requested = 0   
-            print(f"Cell {cell.cell_id} has no dl_total_prb_demand")
+        num_ues, scheduling_policy, dl_prb, dl_demand, cell_ul_rssi = ctx
+
+        # PRBs + UL RSSI (dBm) from serving cell monitor
+        dl_granted, dl_requested, ul_rssi = 0, 0, None
+        if dl_prb is not None:
+            slot = ue._cell_slot
+            dl_granted = dl_prb[slot]
+            dl_requested = dl_demand[slot]
+            if dl_requested < 0:  # no demand computed this step
+                dl_requested = None
+            ul_rssi = cell_ul_rssi[slot]
+            if ul_rssi != ul_rssi:  # NaN = not measured this step
+                ul_rssi = None
 
         # Rates (Mbps)
         tx_brate_mbps = (ue.downlink_bitrate or 0) / 1e6
         rx_brate_mbps = None  # UL not modeled
 
-        # UL RSSI (dBm) from serving cell monitor (cell stores per-UE uplink signal pow)
-        ul_rssi = None
-        if cell and hasattr(cell, "ue_uplink_signal_strength_dict"):
-            ul_rssi = cell.ue_uplink_signal_strength_dict.get(ue.ue_imsi, None)
-
         # Slicing info
         slicing_enabled = ue.slice_type is not None
         slice_id = ue.slice_type
@@ -68,55 +119,107 @@ class xAppKPICollector(xAppBase):
         last_new_dl_bytes = getattr(ue, "last_new_dl_bytes", None)
         downlink_latency_ms = (ue.downlink_latency or 0) * 1000.0  # if you store seconds
 
-        placeholders = dict(
-            power_multiplier=None,
-            dl_n_samples=None,
-            tx_pkts_downlink=None, tx_errors_downlink_pct=None,
-            ul_mcs=None, ul_n_samples=None, ul_buffer_bytes=None,
-            rx_pkts_uplink=None, rx_errors_uplink_pct=None,
-            ul_sinr=None, phr=None, dl_pmi=None, dl_ri=None, ul_n=None, ul_turbo_iters=None,
+        # positional row in self.fields order (None = not modeled)
+        # (keep _row_state in sync with what is read here)
+        return (
+            now_ms,                 # Timestamp
+            num_ues,
+            ue.ue_imsi,
+            slicing_enabled,
+            slice_id,
+            slice_prb,
+            None,                   # power_multiplier
+            scheduling_policy,
+            dl_mcs,
+            None,                   # dl_n_samples
+            dl_buffer_bytes,
+            last_new_dl_bytes,
+            downlink_latency_ms,
+            tx_brate_mbps,
+            None,                   # tx_pkts_downlink
+            None,                   # tx_errors_downlink_pct
+            dl_cqi,
+            None,                   # ul_mcs
+            None,                   # ul_n_samples
+            None,                   # ul_buffer_bytes
+            rx_brate_mbps,
+            None,                   # rx_pkts_uplink
+            None,                   # rx_errors_uplink_pct
+            ul_rssi,
+            None,                   # ul_sinr
+            None,                   # phr
+            dl_requested,           # sum_requested_prbs
+            dl_granted,             # sum_granted_prbs
+            None,                   # dl_pmi
+            None,                   # dl_ri
+            None,                   # ul_n
+            None,                   # ul_turbo_iters
         )
 
-        return {
-            "Timestamp": int(time.time()*1000),
-            "num_ues": num_ues,
-            "IMSI": ue.ue_imsi,
-            **placeholders,
-            "slicing_enabled": slicing_enabled,
-            "slice_id": slice_id,
-            "slice_prb": slice_prb,
-            "scheduling_policy": scheduling_policy,
-            "dl_mcs": dl_mcs,
-            "dl_buffer_bytes": dl_buffer_bytes,
-            "last_new_dl_bytes": last_new_dl_bytes,
-            "downlink_latency_ms": downlink_latency_ms,
-            "tx_brate_downlink_Mbps": tx_brate_mbps,
-            "dl_cqi": dl_cqi,
-            "ul_rssi": ul_rssi,
-            "sum_requested_prbs": dl_requested,
-            "sum_granted_prbs": dl_granted,
-        }
+    def _row_state(self, ue, cell):
+        # Cheap stand-in for a row's content (minus Timestamp): the cell's
+        # _alloc_version moves with its PRB grants and UE set; demand and
+        # UL RSSI follow from the UE's MCS, position and transmit power.
+        if cell is None:
+            return (None, len(self.ue_list), _UE_ROW_STATE(ue))
+        return (cell, cell._alloc_version, cell.scheduler_policy, _UE_ROW_STATE(ue))
 
     def step(self):
         if not self.enabled:
             return
         rows = []
+        now_ms = time.time_ns() // 1_000_000  # one timestamp per sim step
+        skip_unchanged = self.skip_unchanged_rows
+        last_state = self._last_state
+        # rebuilt every step so disconnected/removed UEs don't pile up
+        seen_state = {}
+        cell_ctx = {}
         for ue in self.ue_list.values():
             if not ue.connected:
                 continue
-            rows.append(self._row_for_ue(ue))
-        if not rows:
-            return
-
-        with open(self.out_path, "a", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=self.fields)
-            if not self._wrote_header:
-                writer.writeheader()
-                self._wrote_header = True
-            writer.writerows(rows)
+            cell = ue.current_cell
+            if skip_unchanged:
+                # checked before any row (or cell context) is built
+                state = self._row_state(ue, cell)
+                seen_state[ue.ue_imsi] = state
+                if last_state.get(ue.ue_imsi) == state:
+                    continue
+            ctx = cell_ctx.get(cell)
+            if ctx is None:
+                ctx = cell_ctx[cell] = self._cell_context(cell)
+            rows.append(self._row_for_ue(ue, ctx, now_ms))
+        self._last_state = seen_state
+        if rows:
+            self._row_buf.extend(rows)
+        if (
+            len(self._row_buf) >= ROW_BUFFER_LIMIT
+            or time.time() - self._last_flush >= FLUSH_INTERVAL_SEC
+        ):
+            self.flush()
+
+    def flush(self):
+        if self._row_buf:
+            if self._w is None:
+                self._open()
+            self._write_rows(self._row_buf)
+            self._row_buf.clear()
+        if self._f is not None:
+            self._f.flush()
+        self._last_flush = time.time()
+
+    def close(self):
+        self.flush()
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+            self._w = None
+
+    def stop(self):
+        # write out buffered rows; a later step()/flush() reopens the file
+        self.close()
 
     def to_json(self):
         j = super().to_json()
         j["out_path"] = self.out_path
-        j["fields"] = self.fields
+        j["fields"] = self._fields_tuple
         return j
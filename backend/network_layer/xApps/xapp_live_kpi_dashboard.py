@@ -3,40 +3,61 @@
 # Drop this file into: network_layer/xApps/
 #
 # Requires:
-#   pip install dash==2.* plotly==5.*
+#   pip install "dash>=2.17" plotly   # callbacks without an Output need 2.17+
+#
+# Optional:
+#   pip install waitress   # multi-threaded server instead of Flask's dev server
+#   pip install orjson     # faster callback JSON; plotly's "auto" engine uses it
 #
 # Starts a small Dash server on http://localhost:8061 and plots:
 #   - Per‑UE: DL bitrate (Mbps), SINR (dB), CQI, DL buffer (bytes)*
-#   - Per‑UE: Allocated DL PRBs (if available from cell.prb_ue_allocation_dict)
+#   - Per‑UE: Allocated DL PRBs (from the serving cell's dl_prb array)
 #   - Per‑Cell: DL load (0–1), Allocated vs Max DL PRBs
 # Fields marked * are optional and shown if present on UE objects.
 #
 # Notes:
 # - We read KPIs directly from self.ue_list / self.cell_list each sim step.
-# - We use getattr(...) everywhere so it won't crash if some fields are not present.
-# - To keep memory small we store a rolling window (MAX_POINTS).
+# - We use getattr(...) for optional fields so it won't crash if some are not
+#   present; the per-UE KPIs UE.__init__ always sets are read with one attrgetter.
+# - To keep memory small we store a rolling window (MAX_POINTS) in preallocated
+#   float32 ring buffers, one row per UE/cell (NaN = no sample at that step).
+# - KPIs are only sampled while a browser tab is polling the dashboard.
+# - Each refresh only ships the new samples (dcc.Graph extendData); whole
+#   figures are sent when a tab first loads, its set of traces changes or the
+#   window is longer than MAX_SHOWN_POINTS (traces are then downsampled).
 
 from .xapp_base import xAppBase
 
 import threading
-from collections import defaultdict, deque
+import time
+from operator import attrgetter
+
+import numpy as np
 
 # Dash / Plotly
-# pip install dash==2.* plotly==5.*
-from dash import Dash, dcc, html, Input, Output, State
+from dash import Dash, dcc, html, Input, Output, State, no_update
 import plotly.graph_objs as go
 
 from dash.exceptions import PreventUpdate
 
+try:
+    from waitress import serve as waitress_serve
+except ImportError:
+    waitress_serve = None
+
 
 from settings import (
-    RAN_PRB_CAP_SLIDER_DEFAULT, RAN_PRB_CAP_SLIDER_MAX
+    RAN_PRB_CAP_SLIDER_DEFAULT, RAN_PRB_CAP_SLIDER_MAX, RIC_KPI_DASHBOARD_STRIDE,
+    SIM_STEP_TIME_DEFAULT,
 )
 
-#MAX_POINTS = 600      # ~ last 5 minutes at 0.5 s refresh
-MAX_POINTS = 50
+MAX_POINTS = 600      # ~ last 5 minutes at 0.5 s refresh
 REFRESH_SEC = 0.5
 DASH_PORT = 8061
+DASH_THREADS = 4  # waitress worker threads (interval callback + assets + sliders)
+MAX_SHOWN_POINTS = 200  # per trace sent to the browser; longer series are downsampled
+# No dashboard refresh for this long = no open tab; step() then records nothing
+CLIENT_TIMEOUT_SEC = 5 * REFRESH_SEC
 
 # --- Layout helpers (keeps graphs compact) ---
 CONTAINER_STYLE = {
@@ -49,8 +70,9 @@ CONTAINER_STYLE = {
 ROW_2COL = {"display": "grid", "gridTemplateColumns": "repeat(2, minmax(0, 1fr))", "gap": "12px"}
 ROW_1COL = {"display": "grid", "gridTemplateColumns": "1fr", "gap": "12px"}
 
-def tidy(fig, title, ytitle):
-    fig.update_layout(
+def tidy(title, ytitle):
+    # Figure layout as a plain dict (named template expanded), built once per graph
+    return go.Layout(
         title=title,
         xaxis_title="Sim step",
         yaxis_title=ytitle,
@@ -58,43 +80,228 @@ def tidy(fig, title, ytitle):
         margin=dict(l=40, r=10, t=40, b=35), # <= tighter margins
         legend=dict(orientation="h", y=-0.25, x=0),  # horizontal legend below
         template="plotly_white",
-    )
-    return fig
+    ).to_plotly_json()
+
+
+# Figures are sent as plain dicts: go.Figure/go.Scattergl validate every
+# property on construction, which dominated the refresh callback
+LAYOUT_BITRATE = tidy("Per‑UE Downlink Bitrate (Mbps)", "Mbps")
+LAYOUT_SINR = tidy("Per‑UE SINR", "SINR (dB)")
+LAYOUT_CQI = tidy("Per‑UE CQI", "CQI")
+LAYOUT_PRB_GRANTED = tidy("Per‑UE DL PRBs — GRANTED", "PRBs")
+LAYOUT_PRB_REQUESTED = tidy("Per‑UE DL PRBs — REQUESTED", "PRBs")
+LAYOUT_CELL = tidy("Per‑Cell Load & PRBs", "Value / PRBs")
+LAYOUT_BUF = tidy("Per‑UE DL Buffer (bytes)*", "Bytes")
+
+# Slider labels (clientside callbacks; same normalization as _set_slice_weights)
+_JS_CAP_LABEL = """
+function(v) {
+    return "Current cap: " + (v == null ? "unlimited" : Math.trunc(v)) + " PRBs/UE";
+}
+"""
+_JS_SLICE_LABEL = """
+function(e, u, m) {
+    if (e == null || u == null || m == null) {
+        return window.dash_clientside.no_update;
+    }
+    const w = [e, u, m].map(x => Math.max(0, Number(x)));
+    const s = (w[0] + w[1] + w[2]) || 1;
+    const pct = w.map(x => (x / s * 100).toFixed(1) + "%");
+    return "Effective slice shares → eMBB: " + pct[0] + " | URLLC: " + pct[1] + " | mMTC: " + pct[2];
+}
+"""
+
+# Graphs refreshed by the tick callback, in output order
+GRAPH_IDS = (
+    "ue-bitrate", "ue-sinr", "ue-cqi", "ue-prb-granted", "ue-prb-requested",
+    "cell-load", "ue-buffer",
+)
+GRAPH_LAYOUTS = (
+    LAYOUT_BITRATE, LAYOUT_SINR, LAYOUT_CQI, LAYOUT_PRB_GRANTED, LAYOUT_PRB_REQUESTED,
+    LAYOUT_CELL, LAYOUT_BUF,
+)
+
+
+_DOT = {"dash": "dot"}
+_DASH = {"dash": "dash"}
+
+
+def _trace(xs, ys, name, line=None):
+    tr = {"type": "scattergl", "x": xs, "y": ys, "mode": "lines", "name": name}
+    if line is not None:
+        tr["line"] = line
+    return tr
+
+
+def _lttb(xs, ys, n_out):
+    # Largest-Triangle-Three-Buckets: keep the first and last point and, from
+    # each of the n_out - 2 buckets in between, the point spanning the largest
+    # triangle with the previously kept point and the next bucket's mean.
+    n = len(ys)
+    x = xs.astype(np.float64)
+    y = ys.astype(np.float64)
+    edges = np.append(np.linspace(1, n - 1, n_out - 1).astype(np.intp), n)
+    keep = np.empty(n_out, dtype=np.intp)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi, nxt = edges[i], edges[i + 1], edges[i + 2]
+        cx, cy = x[hi:nxt].mean(), y[hi:nxt].mean()
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(area.argmax())
+        keep[i + 1] = a
+    return xs[keep], ys[keep]
+
+
+def _thin(xs, ys):
+    # Downsample to at most MAX_SHOWN_POINTS (always incl. the first/last sample):
+    # LTTB for gap-free series, evenly spaced samples when there are NaN gaps
+    n = len(ys)
+    if n <= MAX_SHOWN_POINTS:
+        return xs, ys
+    if not np.isnan(ys).any():
+        return _lttb(xs, ys, MAX_SHOWN_POINTS)
+    step = -(-n // MAX_SHOWN_POINTS)
+    start = (n - 1) % step
+    return xs[start::step], ys[start::step]
+
+
+def _series(names, rows, lines=None):
+    # (name, samples, index of first sample, line style) for each row with any
+    # sample in the window; rows without one get no trace
+    valid = ~np.isnan(rows)
+    first = np.where(valid.any(axis=1), valid.argmax(axis=1), -1)
+    return [
+        (name, rows[r], int(first[r]), lines[r] if lines else None)
+        for r, name in enumerate(names)
+        if first[r] >= 0
+    ]
+
+
+# Trace name suffix for each per-UE metric
+_UE_TRACE_LABELS = {
+    "dl_mbps": "DL Mbps",
+    "sinr_db": "SINR (dB)",
+    "cqi": "CQI",
+    "dl_buf": "DL buffer (bytes)",
+    "dl_prb": "granted",
+    "dl_prb_req": "requested",
+}
 
 
-def _deque():
-    return deque(maxlen=MAX_POINTS)
+# Per-UE KPIs sampled every step (all set in UE.__init__), one column each
+_UE_KPIS = attrgetter("downlink_bitrate", "downlink_sinr", "downlink_cqi", "dl_buffer_bytes")
+_N_UE_KPIS = 4
+
+
+class _KPIRing:
+    # Rolling window of samples for several metrics, one row per key (IMSI or
+    # cell id) and one column per sampled sim step. Rows are added on first
+    # sight and released again by evict(); columns are shared with the
+    # dashboard's time axis.
+    def __init__(self, metrics):
+        self.rows = {}  # {key: row}
+        self.free = []  # released rows, reused before growing
+        self.n_rows = 0  # rows ever handed out (high-water mark)
+        self.seen = np.zeros(0, dtype=np.int64)  # sample index of each row's last write
+        self.data = {m: np.full((0, MAX_POINTS), np.nan, dtype=np.float32) for m in metrics}
+
+    def row(self, key):
+        r = self.rows.get(key)
+        if r is None:
+            if self.free:
+                r = self.free.pop()
+            else:
+                r = self.n_rows
+                self.n_rows += 1
+                n = len(self.seen)
+                if r >= n:
+                    size = max(8, 2 * n)
+                    for m, old in self.data.items():
+                        new = np.full((size, MAX_POINTS), np.nan, dtype=np.float32)
+                        new[:n] = old
+                        self.data[m] = new
+                    self.seen = np.append(self.seen, np.zeros(size - n, dtype=np.int64))
+            self.rows[key] = r
+        return r
+
+    def clear_column(self, col):
+        for arr in self.data.values():
+            arr[:, col] = np.nan
+
+    def evict(self, before):
+        # Release rows not written since sample `before`; once that is a full
+        # window back their columns have all been cleared, so they are all NaN.
+        seen = self.seen
+        for key in [k for k, r in self.rows.items() if seen[r] < before]:
+            self.free.append(self.rows.pop(key))
+
+    def window(self, idx):
+        # (keys, {metric: rows x columns idx}) for the current keys
+        items = list(self.rows.items())
+        rows = np.fromiter((r for _, r in items), dtype=np.intp, count=len(items))
+        sel = np.ix_(rows, idx)
+        return [k for k, _ in items], {m: arr[sel] for m, arr in self.data.items()}
+
 
 class xAppLiveKPIDashboard(xAppBase):
     def __init__(self, ric=None):
         super().__init__(ric=ric)
         self.enabled = True
 
-        # Rolling time axis (simulation step)
-        self._t = _deque()
+        # Rolling time axis (simulation step); column i of every ring holds the
+        # samples taken at _t[i]. _n_samples counts all samples ever taken;
+        # _n_writing runs one ahead while step() is overwriting a column.
+        self._t = np.zeros(MAX_POINTS, dtype=np.int64)
+        self._n_samples = 0
+        self._n_writing = 0
 
         # --- Per‑UE series ---
-        self._ue_dl_mbps = defaultdict(_deque)      # {IMSI: deque}
-        self._ue_sinr_db = defaultdict(_deque)      # {IMSI: deque}
-        self._ue_cqi     = defaultdict(_deque)      # {IMSI: deque}
-        self._ue_dl_buf  = defaultdict(_deque)      # optional: {IMSI: deque}
-        self._ue_dl_prb  = defaultdict(_deque)      # from cell allocation map if present
-        self._ue_dl_prb_req = defaultdict(_deque)   # <-- NEW: requested PRBs
+        self._ue = _KPIRing((
+            "dl_mbps",
+            "sinr_db",
+            "cqi",
+            "dl_buf",      # optional
+            "dl_prb",      # from the serving cell's dl_prb array
+            "dl_prb_req",  # requested PRBs
+        ))
 
         # --- Per‑Cell series ---
-        self._cell_dl_load    = defaultdict(_deque)  # {cell_id: deque in [0,1]}
-        self._cell_alloc_prb  = defaultdict(_deque)  # {cell_id: deque}
-        self._cell_max_prb    = defaultdict(_deque)  # {cell_id: deque} (constant but we plot to show headroom)
-
-        # Concurrency
+        self._cell = _KPIRing((
+            "dl_load",    # in [0,1]
+            "alloc_prb",
+            "max_prb",    # constant but we plot to show headroom
+        ))
+
+        # Concurrency: step() is the only writer of the KPI rings and _snapshot
+        # reads them without locking; the lock only serializes slider writes
         self._lock = threading.Lock()
 
         # Dash server thread
         self._dash_app = None
         self._dash_thread = None
+        # Figure render thread (see _render_loop); runs until stop()
+        self._render_thread = None
+        self._render_stop = threading.Event()
+
+        # Simulation engine (resolved in start)
+        self._sim_engine = None
 
         # Last step seen (avoid double pushes)
         self._last_step = None
+        # Latest shared render (see _render), published by the render thread
+        self._latest = None
+        # monotonic time of the last tick from any open tab
+        self._last_poll = float("-inf")
+        # Sample every N-th sim step: no point recording faster than the page refreshes
+        # (settings.RIC_KPI_DASHBOARD_STRIDE overrides; raise it for fast sims)
+        if RIC_KPI_DASHBOARD_STRIDE is not None:
+            stride = RIC_KPI_DASHBOARD_STRIDE
+        elif SIM_STEP_TIME_DEFAULT > 0:
+            stride = REFRESH_SEC / SIM_STEP_TIME_DEFAULT
+        else:
+            stride = 1  # unthrottled sim (no step time): sample every step
+        self._sample_stride = max(1, int(stride))
         
         self._prb_cap = None  # None = unlimited; or int for a live cap
         self.w_embb = None
@@ -105,72 +312,184 @@ class xAppLiveKPIDashboard(xAppBase):
     # ---------------- xApp lifecycle ----------------
 
     def start(self):
+        # engine is fixed once the RIC is up; resolve it once instead of per step
+        self._sim_engine = getattr(self.ric, "simulation_engine", None)
         if not self.enabled:
             print(f"{self.xapp_id}: disabled")
             return
         self._start_dashboard()
 
+    def stop(self):
+        # ends the render thread; step() restarts it if the sim runs again
+        self._render_stop.set()
+
     def step(self):
         """Collect KPIs each simulation step."""
-        sim_step = getattr(getattr(self.ric, "simulation_engine", None), "sim_step", None)
+        if not self.enabled:
+            return
+        eng = self._sim_engine
+        sim_step = eng.sim_step if eng is not None else None
         if sim_step is None or sim_step == self._last_step:
             return
         self._last_step = sim_step
-
-        with self._lock:
-            self._t.append(sim_step)
-
-            # ---- Per‑UE ----
-            for imsi, ue in self.ue_list.items():
-                # DL bitrate (bps -> Mbps)
-                dl_bps = float(getattr(ue, "downlink_bitrate", 0.0) or 0.0)
-                self._ue_dl_mbps[imsi].append(dl_bps / 1e6)
-
-                # SINR (dB)
-                sinr = getattr(ue, "downlink_sinr", None)
-                if sinr is not None:
-                    self._ue_sinr_db[imsi].append(float(sinr))
-
-                # CQI
-                cqi = getattr(ue, "downlink_cqi", None)
-                if cqi is not None:
-                    self._ue_cqi[imsi].append(float(cqi))
-
-                # Optional queues/buffers (if your UE defines them)
-                if hasattr(ue, "dl_buffer_bytes"):
-                    self._ue_dl_buf[imsi].append(float(getattr(ue, "dl_buffer_bytes", 0.0) or 0.0))
-
-                # Allocated PRBs for this UE (DL), if cell exposes prb_ue_allocation_dict
-                cell = getattr(ue, "current_cell", None)
-                if cell is not None:
-                    alloc_map = getattr(cell, "prb_ue_allocation_dict", {}) or {}
-                    ue_key = imsi if imsi in alloc_map else getattr(ue, "ue_imsi", None)
-                    ue_alloc = alloc_map.get(ue_key, {})
-                    dl_prb = ue_alloc.get("downlink", None)
-                    if dl_prb is not None:
-                        self._ue_dl_prb[imsi].append(float(dl_prb))
-                    
-                    # robustly handle absence on early steps
-                    dl_req_map = getattr(cell, "dl_total_prb_demand", {}) or {}
-                    dl_requested = dl_req_map.get(imsi, None)
-                    if dl_requested is not None:
-                        self._ue_dl_prb_req[imsi].append(float(dl_requested))
-
-            # ---- Per‑Cell ----
-            for cell_id, cell in self.cell_list.items():
-                load = getattr(cell, "current_dl_load", None)
-                if load is not None:
-                    self._cell_dl_load[cell_id].append(float(load))
-
-                alloc_dl = getattr(cell, "allocated_dl_prb", None)
-                if alloc_dl is not None:
-                    self._cell_alloc_prb[cell_id].append(float(alloc_dl))
-
-                max_prb = getattr(cell, "max_dl_prb", None)
-                if max_prb is not None:
-                    self._cell_max_prb[cell_id].append(float(max_prb))
-                    
-            
+        if sim_step % self._sample_stride:
+            return
+        if time.monotonic() - self._last_poll > CLIENT_TIMEOUT_SEC:
+            return  # headless run: nobody is looking at the dashboard
+        if self._render_thread is not None and not self._render_thread.is_alive():
+            self._start_render()  # stopped with the previous simulation run
+
+        col = self._n_samples % MAX_POINTS
+        self._n_writing = self._n_samples + 1  # column col is now in flight
+        self._ue.clear_column(col)
+        self._cell.clear_column(col)
+
+        # ---- Per‑UE: one pass over the UEs reads every KPI and its cell slot ----
+        ue_row = self._ue.row
+        ue_rows, kpis = [], []
+        by_cell = {}  # {cell: ([ring row], [cell slot])}
+        for imsi, ue in self.ue_list.items():
+            r = ue_row(imsi)
+            ue_rows.append(r)
+            kpis.extend(_UE_KPIS(ue))
+            cell, slot = ue.current_cell, ue._cell_slot
+            if cell is not None and slot is not None:
+                rows, slots = by_cell.setdefault(cell, ([], []))
+                rows.append(r)
+                slots.append(slot)
+        ue_rows = np.asarray(ue_rows, dtype=np.intp)
+        cell_rows = [self._cell.row(cell_id) for cell_id in self.cell_list]
+        # bind the arrays only now: adding a row may have reallocated them
+        ue_dl_mbps, ue_sinr_db, ue_cqi, ue_dl_buf, ue_dl_prb, ue_dl_prb_req = (
+            self._ue.data.values()
+        )
+        cell_dl_load, cell_alloc_prb, cell_max_prb = self._cell.data.values()
+        self._ue.seen[ue_rows] = self._n_samples
+        self._cell.seen[cell_rows] = self._n_samples
+
+        # DL bitrate (bps -> Mbps; None -> 0), SINR (dB), CQI, DL buffer (bytes);
+        # one column per metric, written in one go (None -> NaN)
+        dl_bps, sinr_db, cqi, dl_buf = np.array(kpis, dtype=np.float32).reshape(-1, _N_UE_KPIS).T
+        ue_dl_mbps[ue_rows, col] = np.where(np.isnan(dl_bps), 0.0, dl_bps) / 1e6
+        ue_sinr_db[ue_rows, col] = sinr_db
+        ue_cqi[ue_rows, col] = cqi
+        ue_dl_buf[ue_rows, col] = dl_buf
+
+        # Allocated/requested PRBs (DL), read from each serving cell's per-slot arrays
+        for cell, (r, slots) in by_cell.items():
+            ue_dl_prb[r, col] = cell.dl_prb[slots]
+            # robustly handle absence on early steps (-1 = no demand yet)
+            dl_requested = cell.dl_demand[slots]
+            ue_dl_prb_req[r, col] = np.where(dl_requested >= 0, dl_requested, np.nan)
+
+        # ---- Per‑Cell ----
+        for r, cell in zip(cell_rows, self.cell_list.values()):
+            load = getattr(cell, "current_dl_load", None)
+            if load is not None:
+                cell_dl_load[r, col] = load
+
+            alloc_dl = getattr(cell, "allocated_dl_prb", None)
+            if alloc_dl is not None:
+                cell_alloc_prb[r, col] = alloc_dl
+
+            max_prb = getattr(cell, "max_dl_prb", None)
+            if max_prb is not None:
+                cell_max_prb[r, col] = max_prb
+
+        self._t[col] = sim_step
+        self._n_samples += 1  # publishes the column to _snapshot
+
+        # Drop UEs/cells that have not reported for a whole window
+        if self._n_samples % MAX_POINTS == 0:
+            self._ue.evict(self._n_samples - MAX_POINTS)
+            self._cell.evict(self._n_samples - MAX_POINTS)
+
+    def _snapshot(self):
+        # Copy of the samples in the window, oldest first: (n_samples, tx,
+        # ue_keys, {metric: rows x samples}, cell_keys, {metric: rows x samples}),
+        # or None before the first sample.
+        # Reads race with step(): keys are read before the arrays (rows are
+        # grown before their key appears, and a released row is all NaN until
+        # reused), and columns step() started overwriting during the copy are
+        # dropped afterwards (none while no step() write is in flight, so a
+        # full window keeps MAX_POINTS samples, like extendData's maxPoints).
+        wp = self._n_samples
+        lo = max(0, wp - MAX_POINTS)
+        if wp == lo:
+            return None
+        idx = np.arange(lo, wp) % MAX_POINTS
+        tx = self._t[idx]
+        ue_keys, ue = self._ue.window(idx)
+        cell_keys, cell = self._cell.window(idx)
+
+        torn = max(0, self._n_writing - MAX_POINTS - lo)
+        if torn:
+            tx = tx[torn:]
+            ue = {m: arr[:, torn:] for m, arr in ue.items()}
+            cell = {m: arr[:, torn:] for m, arr in cell.items()}
+            if not tx.size:
+                return None
+        return wp, tx, ue_keys, ue, cell_keys, cell
+
+    def _render(self):
+        # Series and full figures for the current window, shared by all tabs:
+        # (n_samples, tx, [[(name, ys, first, line)] per graph], [[name] per graph],
+        # [figure per graph]), or None before the first sample.
+        snap = self._snapshot()
+        if snap is None:
+            return None
+        n_samples, tx, ue_keys, ue, cell_keys, cell = snap
+
+        # --- Series per graph, in GRAPH_IDS order ---
+        def ue_series(m):
+            label = _UE_TRACE_LABELS[m]
+            return _series([f"{imsi} {label}" for imsi in ue_keys], ue[m])
+
+        # cell graph: load traces first, then alloc/max per cell
+        prb_rows = np.stack((cell["alloc_prb"], cell["max_prb"]), axis=1).reshape(-1, len(tx))
+        prb_names = [n for cid in cell_keys for n in (f"{cid} alloc PRB", f"{cid} max PRB")]
+        series = [
+            ue_series("dl_mbps"),
+            ue_series("sinr_db"),
+            ue_series("cqi"),
+            ue_series("dl_prb"),
+            ue_series("dl_prb_req"),
+            _series([f"{cid} DL load" for cid in cell_keys], cell["dl_load"])
+            + _series(prb_names, prb_rows, (_DOT, _DASH) * len(cell_keys)),
+            ue_series("dl_buf"),
+        ]
+        names = [[name for name, *_ in s] for s in series]
+        figs = [
+            {
+                "data": [
+                    _trace(*_thin(tx[first:], ys[first:]), name, line)
+                    for name, ys, first, line in s
+                ],
+                "layout": layout,
+            }
+            for s, layout in zip(series, GRAPH_LAYOUTS)
+        ]
+        return n_samples, tx, series, names, figs
+
+    def _start_render(self):
+        self._render_stop.clear()
+        self._render_thread = threading.Thread(target=self._render_loop, daemon=True)
+        self._render_thread.start()
+
+    def _render_loop(self):
+        # Rebuilds self._latest off the Dash worker threads whenever a new
+        # sample was taken; the tick callback only picks up the result.
+        # Exits on stop() (sim stopped, network reset, xApps reloaded) or
+        # once the xApp is disabled.
+        stop = self._render_stop
+        while self.enabled and not stop.is_set():
+            latest = self._latest
+            if latest is None or latest[0] != self._n_samples:
+                try:
+                    self._latest = self._render()
+                except Exception as e:  # keep the loop alive; retried next tick
+                    print(f"{self.xapp_id}: figure render failed: {e!r}")
+            stop.wait(REFRESH_SEC)
 
     # ---------------- Dash server ----------------
 
@@ -178,7 +497,8 @@ class xAppLiveKPIDashboard(xAppBase):
         if self._dash_thread and self._dash_thread.is_alive():
             return
 
-        app = Dash(__name__)
+        # update_title=None: no "Updating..." tab title flicker on every tick
+        app = Dash(__name__, update_title=None)
         self._dash_app = app
         
         app.layout = html.Div(
@@ -258,12 +578,27 @@ class xAppLiveKPIDashboard(xAppBase):
             html.Div(style=ROW_1COL, children=[ dcc.Graph(id="ue-buffer") ]),
 
             dcc.Interval(id="tick", interval=int(REFRESH_SEC * 1000), n_intervals=0),
+            dcc.Store(id="kpi-sync"),  # what this tab's graphs already hold
             ],
         )
 
-        @app.callback(
+        # Slider labels are formatted in the browser; the server callbacks
+        # below only push the values into the cells
+        app.clientside_callback(
+            _JS_CAP_LABEL,
             Output("prb-cap-label", "children"),
             Input("prb-cap", "value"),
+        )
+        app.clientside_callback(
+            _JS_SLICE_LABEL,
+            Output("slice-weight-label", "children"),
+            Input("w-embb",  "value"),
+            Input("w-urllc", "value"),
+            Input("w-mmtc",  "value"),
+        )
+
+        @app.callback(
+            Input("prb-cap", "value"),
             )
         def _set_cap(val):
             with self._lock:
@@ -271,24 +606,8 @@ class xAppLiveKPIDashboard(xAppBase):
                 self._prb_cap = int(val) if val is not None else None
                 for cell in self.cell_list.values():
                     cell.prb_per_ue_cap = self._prb_cap
-                return f"Current cap: {self._prb_cap if self._prb_cap is not None else 'unlimited'} PRBs/UE"
 
         @app.callback(
-            #Output("ue-bitrate", "figure"),
-            #Output("ue-sinr-cqi", "figure"),
-            Output("ue-bitrate", "figure"),
-            Output("ue-sinr", "figure"),
-            Output("ue-cqi", "figure"),
-            Output("ue-prb-granted", "figure"),
-            Output("ue-prb-requested", "figure"),
-            Output("cell-load", "figure"),
-            Output("ue-buffer", "figure"),
-            Input("tick", "n_intervals"),
-        )
-        
-        
-        @app.callback(
-            Output("slice-weight-label", "children"),
             Input("w-embb",  "value"),
             Input("w-urllc", "value"),
             Input("w-mmtc",  "value"),
@@ -305,126 +624,65 @@ class xAppLiveKPIDashboard(xAppBase):
             # push into cells (the allocator will read this)
             with self._lock:
                 for cell in self.cell_list.values():
-                    cell.slice_weights = dict(weights)  # <-- keep this name consistent with cell.py
-
-            pct = {k: f"{v*100:.1f}%" for k, v in weights.items()}
-            return f"Effective slice shares → eMBB: {pct['eMBB']} | URLLC: {pct['URLLC']} | mMTC: {pct['mMTC']}"
+                    cell.set_slice_weights(weights)
 
 
         #def _update(_n, ue_filter, cell_filter):
-        def _update(_n):
-            with self._lock:
-                tx = list(self._t)
-                if not tx:
-                    # Empty figures before first sample
-                    return go.Figure(), go.Figure(), go.Figure(), go.Figure(), go.Figure()
-
-                ue_keys = list(set(
-                list(self._ue_dl_mbps.keys())
-                + list(self._ue_sinr_db.keys())
-                + list(self._ue_cqi.keys())
-                + list(self._ue_dl_buf.keys())
-                + list(self._ue_dl_prb.keys())
-                + list(getattr(self, "_ue_dl_prb_req", {}).keys())  # if present
-                ))
-
-                cell_keys = list(set(
-                list(self._cell_dl_load.keys())
-                + list(self._cell_alloc_prb.keys())
-                + list(self._cell_max_prb.keys())
-                ))
-                
-                # --- UE bitrate (Mbps) ---
-                tr_bitrate = []
-                for imsi in ue_keys:
-                    ys = list(self._ue_dl_mbps.get(imsi, []))
-                    if ys:
-                        tr_bitrate.append(go.Scatter(x=tx[-len(ys):], y=ys, mode="lines", name=f"{imsi} DL Mbps"))
-
-
-                
-                # --- UE SINR ---
-                tr_sinr = []
-                for imsi in ue_keys:
-                    ys_s = list(self._ue_sinr_db.get(imsi, []))
-                    if ys_s:
-                        tr_sinr.append(go.Scatter(x=tx[-len(ys_s):], y=ys_s, mode="lines", name=f"{imsi} SINR (dB)"))
-                
-                #fig_sinr = go.Figure(data=tr_sinr, layout=go.Layout(title="Per-UE SINR", xaxis={"title": "Sim step"}, yaxis={"title": "SINR (dB)"}))
-
-                # --- UE CQI ---
-                tr_cqi = []
-                for imsi in ue_keys:
-                    ys_c = list(self._ue_cqi.get(imsi, []))
-                    if ys_c:
-                        tr_cqi.append(go.Scatter(x=tx[-len(ys_c):], y=ys_c, mode="lines", name=f"{imsi} CQI"))
-                #fig_cqi = go.Figure(data=tr_cqi, layout=go.Layout(title="Per-UE CQI", xaxis={"title": "Sim step"}, yaxis={"title": "CQI"}))
-
-
-
-                
-                # --- UE DL PRBs: GRANTED (separate plot) ---
-                tr_prb_granted = []
-                for imsi in ue_keys:
-                    ys_g = list(self._ue_dl_prb.get(imsi, []))
-                    if ys_g:
-                        tr_prb_granted.append(go.Scatter(
-                        x=tx[-len(ys_g):], y=ys_g, mode="lines", name=f"{imsi} granted"
-                        ))
-
-
-                # --- UE DL PRBs: REQUESTED (separate plot) ---
-                tr_prb_requested = []
-                for imsi in ue_keys:
-                    ys_r = list(getattr(self, "_ue_dl_prb_req", {}).get(imsi, []))
-                    if ys_r:
-                        tr_prb_requested.append(go.Scatter(
-                        x=tx[-len(ys_r):], y=ys_r, mode="lines", name=f"{imsi} requested"
-                        ))
-
-
-
-
-                # --- Cell load & PRBs ---
-                tr_cell = []
-                for cid in cell_keys:
-                    ys = list(self._cell_dl_load.get(cid, []))
-                    if ys:
-                        tr_cell.append(go.Scatter(x=tx[-len(ys):], y=ys, mode="lines", name=f"{cid} DL load"))
-                for cid in cell_keys:
-                    ys_a = list(self._cell_alloc_prb.get(cid, []))
-                    if ys_a:
-                        tr_cell.append(go.Scatter(x=tx[-len(ys_a):], y=ys_a, mode="lines", name=f"{cid} alloc PRB", line={"dash": "dot"}))
-                    ys_m = list(self._cell_max_prb.get(cid, []))
-                    if ys_m:
-                        tr_cell.append(go.Scatter(x=tx[-len(ys_m):], y=ys_m, mode="lines", name=f"{cid} max PRB", line={"dash": "dash"}))
-
-                # --- UE DL buffer (optional) ---
-                tr_buf = []
-                for imsi in ue_keys:
-                    ys = list(self._ue_dl_buf.get(imsi, []))
-                    if ys:
-                        tr_buf.append(go.Scatter(x=tx[-len(ys):], y=ys, mode="lines", name=f"{imsi} DL buffer (bytes)"))
-
-            
-            fig_bitrate = tidy(go.Figure(data=tr_bitrate), "Per‑UE Downlink Bitrate (Mbps)", "Mbps")
-
-            fig_sinr = tidy(go.Figure(data=tr_sinr), "Per‑UE SINR", "SINR (dB)")
-            fig_cqi  = tidy(go.Figure(data=tr_cqi),  "Per‑UE CQI",  "CQI")
-
-            fig_prb_granted = tidy(go.Figure(data=tr_prb_granted), "Per‑UE DL PRBs — GRANTED", "PRBs")
-            fig_prb_requested = tidy(go.Figure(data=tr_prb_requested), "Per‑UE DL PRBs — REQUESTED", "PRBs")
-
-            fig_cell = tidy(go.Figure(data=tr_cell), "Per‑Cell Load & PRBs", "Value / PRBs")
-            fig_buf  = tidy(go.Figure(data=tr_buf),  "Per‑UE DL Buffer (bytes)*", "Bytes")
-
-            #return fig_bitrate, fig_sinr_cqi, fig_prb, fig_cell, fig_buf
-            return  fig_bitrate, fig_sinr, fig_cqi, fig_prb_granted, fig_prb_requested, fig_cell,fig_buf
-
-
+        @app.callback(
+            #Output("ue-bitrate", "figure"),
+            #Output("ue-sinr-cqi", "figure"),
+            *[Output(g, "figure") for g in GRAPH_IDS],      # full redraw
+            *[Output(g, "extendData") for g in GRAPH_IDS],  # new samples only
+            Output("kpi-sync", "data"),
+            Input("tick", "n_intervals"),
+            State("kpi-sync", "data"),
+        )
+        def _update(_n, sync):
+            # sync (per browser tab): {"n": samples rendered, "names": [[trace name] per graph]}
+            self._last_poll = time.monotonic()  # a tab is open: keep step() sampling
+            latest = self._latest
+            if latest is None:
+                if _n:
+                    raise PreventUpdate
+                # Empty figures before first sample
+                figs = [{"data": [], "layout": layout} for layout in GRAPH_LAYOUTS]
+                return (*figs, *[no_update] * len(GRAPH_IDS), None)
+            n_samples, tx, series, names, figs = latest
+            if sync is not None and sync["n"] == n_samples:
+                # nothing new since the last render (paused or slow sim)
+                raise PreventUpdate
+            new_sync = {"n": n_samples, "names": names}
+
+            # Same traces as the tab already shows: append only the new samples
+            k = n_samples - sync["n"] if sync is not None else 0
+            if (
+                sync is not None
+                and sync["names"] == names
+                and 0 < k <= len(tx)
+                and len(tx) <= MAX_SHOWN_POINTS  # downsampled traces can't be extended
+            ):
+                x_new = tx[-k:]
+                ext = [
+                    (
+                        {"x": [x_new] * len(s), "y": [ys[-k:] for _, ys, _, _ in s]},
+                        list(range(len(s))),
+                        MAX_POINTS,
+                    )
+                    if s else no_update
+                    for s in series
+                ]
+                return (*[no_update] * len(GRAPH_IDS), *ext, new_sync)
+
+            # Otherwise (new tab, UE/cell set changed) send whole figures
+            return (*figs, *[no_update] * len(GRAPH_IDS), new_sync)
+
+        self._start_render()
 
         def _run():
-            app.run_server(host="127.0.0.1", port=DASH_PORT, debug=False)
+            if waitress_serve is not None:
+                waitress_serve(app.server, host="127.0.0.1", port=DASH_PORT, threads=DASH_THREADS)
+            else:
+                app.run(host="127.0.0.1", port=DASH_PORT, debug=False)
 
         self._dash_thread = threading.Thread(target=_run, daemon=True)
         self._dash_thread.start()
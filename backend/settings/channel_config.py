@@ -1,4 +1,5 @@
 import math
+import numpy as np
 
 # ---------------------------
 # Channel Configuration
@@ -35,3 +36,34 @@ CHANNEL_PASS_LOSS_MODEL_MAP = {
     CHANNEL_PASS_LOSS_MODEL_URBAN_MACRO_NLOS: path_loss_urban_macro_nlos,
 }
 
+
+def pass_loss_urban_macro_los_vec(distance_m, frequency_ghz):
+    """3GPP UMa LOS Path Loss Model (TR 38.901), over an array of distances"""
+    distance_m = np.asarray(distance_m, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pl = 28 + 22 * np.log10(distance_m) + 20 * math.log10(frequency_ghz)
+    return np.where(distance_m <= 0, 0.0, pl)
+
+
+def path_loss_urban_macro_nlos_vec(distance_m, frequency_ghz, h_ue=1.5):
+    """3GPP UMa NLOS Path Loss Model (TR 38.901 Section 7.4.1), over an array of distances"""
+    distance_m = np.asarray(distance_m, dtype=np.float64)
+    if frequency_ghz <= 0 or np.any(distance_m <= 0):
+        raise ValueError("Distance and frequency must be positive.")
+
+    pl_los = pass_loss_urban_macro_los_vec(distance_m, frequency_ghz)
+    nlos_pl = (
+        13.54
+        + 39.08 * np.log10(distance_m)
+        + 20 * math.log10(frequency_ghz)
+        - 0.6 * (h_ue - 1.5)
+    )
+    return np.maximum(pl_los, nlos_pl)
+
+
+# Same models, taking a NumPy array of distances (NaN entries stay NaN)
+CHANNEL_PASS_LOSS_MODEL_VEC_MAP = {
+    CHANNEL_PASS_LOSS_MODEL_URBAN_MACRO_LOS: pass_loss_urban_macro_los_vec,
+    CHANNEL_PASS_LOSS_MODEL_URBAN_MACRO_NLOS: path_loss_urban_macro_nlos_vec,
+}
+
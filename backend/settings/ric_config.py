@@ -5,4 +5,12 @@ import os
 # RIC Configuration
 # ---------------------------
 RIC_ENABLE_HANDOVER = True
-RIC_BRUTAL_HANDOVER = False
\ No newline at end of file
+RIC_BRUTAL_HANDOVER = False
+
+# Live KPI dashboard xApp: record KPIs every N-th sim step
+# (None = auto, about one sample per dashboard refresh)
+RIC_KPI_DASHBOARD_STRIDE = None
+
+# KPI collector xApp: skip a UE's CSV row when nothing it is built from
+# changed since the UE's last written row (False = one row per UE per step)
+RIC_KPI_SKIP_UNCHANGED_ROWS = False